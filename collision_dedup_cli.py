@@ -1,18 +1,80 @@
 import argparse
 import hashlib
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+import mmap
 import pickle
 import gzip
 import os
 import glob
+import struct
 import sys
-from typing import Set, IO, Union, Tuple, Dict
+from typing import Set, IO, Union, Tuple, Dict, List, Iterator
+
+# Input files are read in blocks of this size and hashed one block at a time.
+READ_BLOCK_SIZE = 1 << 20
+
+# Hash files are decoded in smaller blocks, since each 4-byte hash expands
+# into a whole line of output.
+DECODE_BLOCK_SIZE = 1 << 16
+
+# The SHA-256 backend is resolved once at import. hashlib binds it to OpenSSL,
+# which picks its SHA-NI / AVX2 code path from the CPU features on first use,
+# so hot loops call this name directly instead of re-resolving the backend.
+sha256 = hashlib.sha256
+
+# On-disk layout of the hash store: a header (magic, item count) followed by
+# one record per item (4-byte hash, value length) and the UTF-8 value itself.
+STORE_MAGIC = b'DDS1'
+STORE_HEADER = struct.Struct('<4sI')
+STORE_RECORD = struct.Struct('<4sI')
+
+# The ASCII characters str.strip() removes; bytes.strip() on its own leaves
+# the \x1c-\x1f separators in place.
+ASCII_WHITESPACE = b' \t\n\r\x0b\x0c\x1c\x1d\x1e\x1f'
+
+def read_line_blocks(infile: IO[bytes], block_size: int = READ_BLOCK_SIZE) -> Iterator[List[bytes]]:
+    """
+    Reads a binary file in large blocks and yields the lines of each block.
+
+    One read() and one bytes.split() per block replace a Python-level
+    iteration per line, which matters for files made of short lines. As in
+    text mode, a line may end in '\n', '\r\n' or a lone '\r'.
+
+    Args:
+        infile (IO[bytes]): A file opened in binary mode.
+        block_size (int): The number of bytes to read at a time.
+
+    Yields:
+        List[bytes]: The complete lines of a block, without their newlines.
+    """
+    pending = b''
+    while True:
+        block = infile.read(block_size)
+        if not block:
+            break
+        data = pending + block
+        held = b''
+        if b'\r' in data:
+            # A '\r' ending the block may be the first half of a '\r\n', so it
+            # waits for the next block before being treated as a newline
+            if data.endswith(b'\r'):
+                data, held = data[:-1], b'\r'
+            data = data.replace(b'\r\n', b'\n').replace(b'\r', b'\n')
+        lines = data.split(b'\n')
+        # The last piece may be an incomplete line; carry it into the next block
+        pending = lines.pop() + held
+        yield lines
+    if pending:
+        # Only a held '\r' can remain in the last line; it ends that line
+        yield [pending.rstrip(b'\r')]
 
 # --- Core Logic Classes (provided by user) ---
 
 class HashStore:
     """
     Manages the storage of unique items by mapping a hash to the original string.
-    Handles serialization to a compressed blob file.
+    Handles serialization to a flat, append-only binary blob file.
     """
 
     def __init__(self, blob_path: str = 'dedupe_store.pkl.gz'):
@@ -20,20 +82,23 @@ class HashStore:
         Initializes the HashStore.
 
         Args:
-            blob_path (str): The path to store the compressed data blob.
+            blob_path (str): The path to store the data blob.
         """
         # The dictionary will store: { hash: original_string }
-        self.items: Dict[str, str] = {}
+        self.items: Dict[bytes, str] = {}
         self.blob_path = blob_path
+        # How many items (and bytes) of the blob file are already written
+        self._saved_count = 0
+        self._saved_size = 0
         self._load_store()
 
-    def add_item(self, item_hash: str, original_string: str) -> bool:
+    def add_item(self, item_hash: bytes, original_string: str) -> bool:
         """
         Adds an item (hash and original string) to the store if the hash is not already present.
         If a hash collision is detected, a warning is printed.
 
         Args:
-            item_hash (str): The hash of the string.
+            item_hash (bytes): The raw 4-byte hash of the string.
             original_string (str): The original string to store.
 
         Returns:
@@ -43,7 +108,7 @@ class HashStore:
             # Check for a hash collision (different string, same hash)
             if self.items[item_hash] != original_string:
                 print(f"WARNING: Hash collision detected! The following string was ignored:")
-                print(f"  Hash: '{item_hash}'")
+                print(f"  Hash: '{item_hash.hex()}'")
                 print(f"  Existing string: '{self.items[item_hash]}'")
                 print(f"  Ignored string:  '{original_string}'")
             return False
@@ -51,12 +116,12 @@ class HashStore:
             self.items[item_hash] = original_string
             return True
 
-    def get_string_by_hash(self, item_hash: str) -> Union[str, None]:
+    def get_string_by_hash(self, item_hash: bytes) -> Union[str, None]:
         """
         Retrieves the original string for a given hash.
 
         Args:
-            item_hash (str): The hash to look up.
+            item_hash (bytes): The raw 4-byte hash to look up.
 
         Returns:
             Union[str, None]: The original string if found, otherwise None.
@@ -67,27 +132,90 @@ class HashStore:
         """Loads the hash-to-string dictionary from the blob file if it exists."""
         if os.path.exists(self.blob_path):
             try:
-                with gzip.open(self.blob_path, 'rb') as f:
-                    self.items = pickle.load(f)
+                with open(self.blob_path, 'rb') as f:
+                    magic = f.read(len(STORE_MAGIC))
+                if magic == STORE_MAGIC:
+                    self._load_flat()
+                else:
+                    self._load_legacy()
                 print(f"Loaded {len(self.items)} items from {self.blob_path}")
-            except (pickle.UnpicklingError, EOFError, gzip.BadGzipFile) as e:
+            except (struct.error, UnicodeDecodeError, pickle.UnpicklingError, EOFError, gzip.BadGzipFile) as e:
                 print(f"Warning: Could not load data blob from {self.blob_path}. Starting fresh. Error: {e}")
                 self.items = {}
+                self._saved_count = self._saved_size = 0
             except Exception as e:
                 print(f"An unexpected error occurred while loading: {e}")
                 self.items = {}
-
+                self._saved_count = self._saved_size = 0
+
+    def _load_flat(self):
+        """Reads the flat binary blob file through a read-only memory map."""
+        items = {}
+        with open(self.blob_path, 'rb') as f, \
+             mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            _, count = STORE_HEADER.unpack_from(mm, 0)
+            unpack_record = STORE_RECORD.unpack_from
+            record_size = STORE_RECORD.size
+            offset = STORE_HEADER.size
+            for _ in range(count):
+                item_hash, length = unpack_record(mm, offset)
+                offset += record_size
+                items[item_hash] = mm[offset:offset + length].decode('utf-8')
+                offset += length
+        self.items = items
+        self._saved_count = len(items)
+        # Appending relies on the file holding exactly the loaded items, in
+        # order; a file with repeated keys is rewritten in full on the next save
+        self._saved_size = offset if count == len(items) else 0
+
+    def _load_legacy(self):
+        """Reads a gzipped pickle blob file written by older versions."""
+        with gzip.open(self.blob_path, 'rb') as f:
+            self.items = pickle.load(f)
+        # Stores written by older versions are keyed by 24-byte hex strings
+        # (hexdigest()[16:]); the 4-byte keys are rebuilt from the stored strings
+        if self.items and isinstance(next(iter(self.items)), str):
+            items = {}
+            for original_string in self.items.values():
+                items.setdefault(DedupeEngine._generate_hash(original_string.encode('utf-8')), original_string)
+            self.items = items
 
     def save_store(self):
-        """Saves the current hash-to-string dictionary to the compressed blob file."""
+        """
+        Saves the current hash-to-string dictionary to the blob file.
+
+        Items are never removed from the store, so when the blob file already
+        holds the items that were loaded, only the newer items are appended.
+        """
         try:
-            with gzip.open(self.blob_path, 'wb') as f:
-                pickle.dump(self.items, f, protocol=pickle.HIGHEST_PROTOCOL)
+            if self._saved_size and os.path.exists(self.blob_path):
+                mode, offset = 'r+b', self._saved_size
+                new_items = itertools.islice(self.items.items(), self._saved_count, None)
+            else:
+                mode, offset = 'wb', STORE_HEADER.size
+                new_items = self.items.items()
+
+            pack_record = STORE_RECORD.pack
+            records = bytearray()
+            for item_hash, original_string in new_items:
+                value = original_string.encode('utf-8')
+                records += pack_record(item_hash, len(value))
+                records += value
+
+            with open(self.blob_path, mode) as f:
+                f.seek(offset)
+                f.write(records)
+                f.truncate()
+                # The header is rewritten last so a partial write is never counted
+                f.seek(0)
+                f.write(STORE_HEADER.pack(STORE_MAGIC, len(self.items)))
+            self._saved_count = len(self.items)
+            self._saved_size = offset + len(records)
             print(f"Successfully saved {len(self.items)} items to {self.blob_path}")
         except IOError as e:
             print(f"Error: Could not write to blob file at {self.blob_path}. Error: {e}")
 
-    def __contains__(self, item_hash: str) -> bool:
+    def __contains__(self, item_hash: bytes) -> bool:
         """Allows for `in` operator checking against hashes."""
         return item_hash in self.items
 
@@ -111,55 +239,176 @@ class DedupeEngine:
         self.hash_store = hash_store
 
     @staticmethod
-    def _generate_hash(text: str) -> str:
+    def _hash_batch(lines: List[bytes]) -> bytes:
+        """
+        Generates the 4-byte hashes for a batch of normalized lines.
+
+        The whole batch is hashed in one tight loop with the module-level
+        SHA-256 backend and the truncated digests are packed into a single
+        contiguous buffer that can be written out as-is.
+
+        Args:
+            lines (List[bytes]): The stripped and lowercased lines to hash.
+
+        Returns:
+            bytes: The concatenated 4-byte hashes, in the same order as `lines`.
+        """
+        # Bytes 8-12 of the digest (hex characters 16-24) form the 4-byte hash
+        hashes = [sha256(line).digest()[8:12] for line in lines]
+        # A hash starting with a zero byte would read back as a blank line marker
+        rehash = DedupeEngine._rehash
+        return b''.join([line_hash if line_hash[0] else rehash(line) for line_hash, line in zip(hashes, lines)])
+
+    @staticmethod
+    def _rehash(line: bytes) -> bytes:
+        """
+        Derives the 4-byte hash of a line whose truncated digest starts with 0x00.
+
+        Encoded files mark blank lines with a single zero byte, so no hash may
+        start with one. About 1 line in 256 needs this: its digest is hashed
+        again until bytes 8-12 start with a non-zero byte.
+
+        Args:
+            line (bytes): The stripped and lowercased line.
+
+        Returns:
+            bytes: The raw 4-byte hash.
+        """
+        digest = sha256(line).digest()
+        while not digest[8]:
+            digest = sha256(digest).digest()
+        return digest[8:12]
+
+    @staticmethod
+    def _strip(line: bytes) -> bytes:
+        """
+        Strips a raw line exactly as str.strip() strips its decoded text.
+
+        ASCII lines, the common case, are stripped as bytes. Other lines are
+        decoded so that Unicode whitespace such as U+00A0 is removed too.
+
+        Args:
+            line (bytes): The raw UTF-8 line, as read from a binary file.
+
+        Returns:
+            bytes: The stripped line.
+        """
+        if line.isascii():
+            return line.strip(ASCII_WHITESPACE)
+        return line.decode('utf-8', errors='replace').strip().encode('utf-8')
+
+    @staticmethod
+    def _lower(line: bytes) -> bytes:
+        """
+        Lowercases a raw line exactly as str.lower() lowercases its decoded text.
+
+        Args:
+            line (bytes): The raw UTF-8 line.
+
+        Returns:
+            bytes: The lowercased line.
         """
-        Generates a 4-byte hash (8 hex characters) for a given text string.
+        if line.isascii():
+            return line.lower()
+        return line.decode('utf-8', errors='replace').lower().encode('utf-8')
+
+    @staticmethod
+    def _normalize(line: bytes) -> bytes:
+        """
+        Normalizes a raw line so that equivalent lines hash identically.
+
+        Args:
+            line (bytes): The raw line, as read from a binary file.
+
+        Returns:
+            bytes: The stripped and lowercased line.
+        """
+        return DedupeEngine._lower(DedupeEngine._strip(line))
+
+    @staticmethod
+    def _generate_hash(line: bytes) -> bytes:
+        """
+        Generates a 4-byte hash for a given line.
 
         This is done by truncating the full SHA-256 hash. This is not
         guaranteed to be unique and is susceptible to collisions.
 
         Args:
-            text (str): The input string to hash.
+            line (bytes): The input line to hash.
 
         Returns:
-            str: The hexadecimal representation of the 4-byte hash.
+            bytes: The raw 4-byte hash.
         """
-        # Normalize the string to ensure consistent hashing
-        normalized_text = text.strip().lower()
-        # Truncate the full SHA-256 hash to the first 8 characters (4 bytes)
-        return hashlib.sha256(normalized_text.encode('utf-8')).hexdigest()[16:]
+        return DedupeEngine._hash_batch([DedupeEngine._normalize(line)])
 
-    def process_line(self, line: str) -> Tuple[Union[str, None], bool]:
+    def process_line(self, line: bytes) -> Tuple[Union[bytes, None], bool]:
         """
-        Processes a single line of text to check for duplicates.
+        Processes a single line to check for duplicates.
 
         Args:
-            line (str): The line of text to process.
+            line (bytes): The raw line to process, as read from a binary file.
 
         Returns:
-            Tuple[Union[str, None], bool]: A tuple containing the original line
-                                           if it's unique (or None) and a boolean
-                                           indicating if it was a new addition.
+            Tuple[Union[bytes, None], bool]: A tuple containing the original line
+                                             if it's unique (or None) and a boolean
+                                             indicating if it was a new addition.
         """
-        stripped_line = line.strip()
+        stripped_line = self._strip(line)
         if not stripped_line:
             return None, False # Ignore empty lines
 
         line_hash = self._generate_hash(stripped_line)
         # We pass the stripped line to the store to save space and be consistent.
-        is_new = self.hash_store.add_item(line_hash, stripped_line)
+        is_new = self.hash_store.add_item(line_hash, stripped_line.decode('utf-8', errors='replace'))
         
         if is_new:
             # Return the original, un-stripped line to preserve original formatting in output file.
             return line, True
         return None, False
 
+    def _encode_lines(self, lines: List[bytes], outfile: IO[bytes]) -> int:
+        """
+        Hashes a block of raw lines, stores them and writes their binary hashes.
+
+        Args:
+            lines (List[bytes]): Raw lines without their trailing newline.
+            outfile (IO[bytes]): The binary file to write the hashes to.
+
+        Returns:
+            int: The number of lines that were new to the store.
+        """
+        strip, lower = self._strip, self._lower
+        stripped_lines = [strip(line) for line in lines]
+        # The lines are already stripped, so lowering them completes the normalization
+        hashes = self._hash_batch([lower(line) for line in stripped_lines if line])
+
+        new_lines_count = 0
+        encoded = bytearray()
+        offset = 0
+        for stripped_line in stripped_lines:
+            if not stripped_line:
+                # Write a special binary marker for a blank line
+                encoded += b'\x00'
+                continue
+
+            line_hash = hashes[offset:offset + 4]
+            offset += 4
+            # Add the item to the store. is_new will be True if it was a new item.
+            is_new = self.hash_store.add_item(line_hash, stripped_line.decode('utf-8', errors='replace'))
+            if is_new:
+                new_lines_count += 1
+            encoded += line_hash
+
+        outfile.write(encoded)
+        return new_lines_count
+
     def process_file(self, input_file_path: str, output_file_path: str):
         """
-        Processes an entire file line by line for deduplication and stores hashes.
+        Processes an entire file block by block for deduplication and stores hashes.
 
-        This method is memory-efficient as it reads the file line by line
-        instead of loading the entire file into memory.
+        This method is memory-efficient as it reads the file in fixed-size
+        blocks instead of loading the entire file into memory. The lines of
+        each block are hashed as one batch.
 
         Args:
             input_file_path (str): Path to the source text file.
@@ -167,25 +416,11 @@ class DedupeEngine:
         """
         new_lines_count = 0
         try:
-            # Open the output file in binary mode
-            with open(input_file_path, 'r', encoding='utf-8') as infile, \
+            # Both files are opened in binary mode; lines are never decoded for hashing
+            with open(input_file_path, 'rb') as infile, \
                  open(output_file_path, 'wb') as outfile:
-                for line in infile:
-                    stripped_line = line.strip()
-                    if not stripped_line:
-                        # Write a special binary marker for a blank line
-                        outfile.write(b'\x00')
-                        continue
-
-                    line_hash = self._generate_hash(stripped_line)
-                    # Add the item to the store. is_new will be True if it was a new item.
-                    is_new = self.hash_store.add_item(line_hash, stripped_line)
-                    
-                    if is_new:
-                        new_lines_count += 1
-                    
-                    # Convert the hex hash to binary and write it to the file
-                    outfile.write(bytes.fromhex(line_hash))
+                for lines in read_line_blocks(infile):
+                    new_lines_count += self._encode_lines(lines, outfile)
 
             print(f"Processed {input_file_path}. Added {new_lines_count} new unique lines to the store.")
             print(f"Hashes of all non-empty content written to {output_file_path} in compact binary format.")
@@ -198,6 +433,85 @@ class DedupeEngine:
         """Persists the current hash store to its blob file."""
         self.hash_store.save_store()
 
+def _seed_worker(file_path: str) -> Tuple[Dict[bytes, str], List[Tuple[bytes, str]], int, Union[str, None]]:
+    """
+    Hashes the lines of one seed file in a worker process.
+
+    The worker only deduplicates within its own file; the parent process
+    merges the results into the HashStore in file order, so the first
+    occurrence of a line still wins. Collisions are reported once per file
+    rather than once per line.
+
+    Args:
+        file_path (str): Path to the seed file.
+
+    Returns:
+        Tuple: The first string seen for each hash, the (hash, string) pairs
+               that collided within the file, the number of lines read, and
+               an error message if the file could not be processed.
+    """
+    # Lines are compared as raw bytes and only decoded once per result
+    items: Dict[bytes, bytes] = {}
+    collisions: Dict[Tuple[bytes, bytes], None] = {}
+    line_count = 0
+    strip, lower = DedupeEngine._strip, DedupeEngine._lower
+
+    try:
+        with open(file_path, 'rb') as f:
+            # Each block of lines is hashed as one batch
+            for lines in read_line_blocks(f):
+                line_count += len(lines)
+                stripped_lines = [strip(line) for line in lines]
+                stripped_lines = [line for line in stripped_lines if line]
+                hashes = DedupeEngine._hash_batch([lower(line) for line in stripped_lines])
+                for offset, stripped_line in zip(range(0, len(hashes), 4), stripped_lines):
+                    item_hash = hashes[offset:offset + 4]
+                    existing = items.setdefault(item_hash, stripped_line)
+                    if existing is not stripped_line and existing != stripped_line:
+                        collisions[item_hash, stripped_line] = None
+    except FileNotFoundError:
+        return {}, [], line_count, f"Error: File not found at {file_path}. Skipping."
+    except Exception as e:
+        return {}, [], line_count, f"An unexpected error occurred while processing {file_path}: {e}. Skipping."
+
+    return (
+        {item_hash: line.decode('utf-8', errors='replace') for item_hash, line in items.items()},
+        [(item_hash, line.decode('utf-8', errors='replace')) for item_hash, line in collisions],
+        line_count,
+        None,
+    )
+
+def scan_hash_block(data: bytes) -> Tuple[List[Union[bytes, None]], int]:
+    """
+    Splits a block of a binary hash file into its records.
+
+    Args:
+        data (bytes): Consecutive bytes from a file written by process_file,
+                      starting at a record boundary.
+
+    Returns:
+        Tuple[List[Union[bytes, None]], int]: The complete records in file
+                                              order, with None for each blank
+                                              line marker, and the number of
+                                              bytes they take up. Any bytes
+                                              after that are the start of an
+                                              incomplete hash.
+    """
+    records = []
+    append = records.append
+    offset = 0
+    size = len(data)
+    while offset < size:
+        if data[offset] == 0:
+            append(None)
+            offset += 1
+        elif offset + 4 <= size:
+            append(data[offset:offset + 4])
+            offset += 4
+        else:
+            break
+    return records, offset
+
 # --- Command Line Interface Logic ---
 
 def main():
@@ -283,19 +597,24 @@ def main():
         total_new_lines = 0
         total_lines = 0
         
-        for file_path in file_paths:
-            print(f"Processing file: {file_path}")
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    for line in f:
-                        total_lines += 1
-                        _, is_new = engine.process_line(line)
-                        if is_new:
-                            total_new_lines += 1
-            except FileNotFoundError:
-                print(f"Error: File not found at {file_path}. Skipping.")
-            except Exception as e:
-                print(f"An unexpected error occurred while processing {file_path}: {e}. Skipping.")
+        # Files are hashed in parallel; results come back in file order and
+        # are merged here so the store sees lines in the same order as before.
+        max_workers = os.cpu_count() or 1
+        chunksize = max(1, len(file_paths) // (max_workers * 4))
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            results = pool.map(_seed_worker, file_paths, chunksize=chunksize)
+            for file_path, (items, collisions, line_count, error) in zip(file_paths, results):
+                print(f"Processing file: {file_path}")
+                total_lines += line_count
+                if error:
+                    print(error)
+                    continue
+                for item_hash, original_string in items.items():
+                    if hash_store.add_item(item_hash, original_string):
+                        total_new_lines += 1
+                # These hashes are already stored, so add_item only reports the collision
+                for item_hash, original_string in collisions:
+                    hash_store.add_item(item_hash, original_string)
 
         print(f"\n--- Seeding Complete ---")
         print(f"Processed {len(file_paths)} file(s) and {total_lines} total lines.")
@@ -322,37 +641,40 @@ def main():
         
         hash_store = HashStore(db_path)
         
+        get_string = hash_store.items.get
         try:
-            # Open the input file in binary mode
             with open(args.decode, 'rb') as f:
+                # Records are decoded a block at a time and each block's lines
+                # are written as soon as they are ready; a hash split across
+                # two blocks is carried over to the next one
+                pending = b''
                 while True:
-                    # Read one byte to check for the blank line marker
-                    marker_byte = f.read(1)
-                    if not marker_byte:
-                        # End of file
+                    block = f.read(DECODE_BLOCK_SIZE)
+                    if not block:
                         break
-                    
-                    if marker_byte == b'\x00':
-                        # Found a blank line marker, print a newline
-                        print()
-                        continue
-                    
-                    # It's not a marker, so it must be the first byte of a hash
-                    hash_bytes = marker_byte + f.read(3)
-                    
-                    if len(hash_bytes) != 4:
-                        print(f"Warning: Unexpected file format. Hash length is not 4 bytes.")
-                        break
-
-                    # Convert the binary hash back to a hex string
-                    hash_value = hash_bytes.hex()
-                    
-                    original_string = hash_store.get_string_by_hash(hash_value)
-                    if original_string:
-                        # Print the original string
-                        print(original_string)
-                    else:
-                        print(f"Warning: Hash '{hash_value}' not found in the database.")
+                    data = pending + block if pending else block
+                    records, consumed = scan_hash_block(data)
+                    pending = data[consumed:]
+
+                    output = []
+                    for hash_bytes in records:
+                        if hash_bytes is None:
+                            # Found a blank line marker, print a newline
+                            output.append('')
+                            continue
+
+                        # The store is keyed by the raw hash bytes, so no conversion is needed
+                        original_string = get_string(hash_bytes)
+                        if original_string:
+                            output.append(original_string)
+                        else:
+                            output.append(f"Warning: Hash '{hash_bytes.hex()}' not found in the database.")
+
+                    if output:
+                        sys.stdout.write('\n'.join(output))
+                        sys.stdout.write('\n')
+            if pending:
+                print(f"Warning: Unexpected file format. Hash length is not 4 bytes.")
         except FileNotFoundError:
             print(f"Error: Hash file not found at {args.decode}")
             sys.exit(1)
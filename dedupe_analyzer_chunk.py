@@ -7,10 +7,126 @@ on potential space savings through deduplication.
 """
 
 import argparse
+import functools
 import glob
-from collections import defaultdict
+import hashlib
+import heapq
+import mmap
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor, wait
 import os
 
+try:
+    from xxhash import xxh3_64_intdigest as chunk_digest
+except ImportError:
+    # xxhash is optional; fall back to a short BLAKE2b digest from the standard library
+    def chunk_digest(chunk):
+        """Returns a compact 8-byte digest identifying a chunk."""
+        return hashlib.blake2b(chunk, digest_size=8).digest()
+
+# hashlib (and xxhash) release the GIL while digesting buffers of at least this
+# many bytes, so chunks this large can be hashed on several threads at once.
+GIL_RELEASE_SIZE = 2048
+
+# Threads used to hash large chunks, and how many chunks each task hashes
+HASH_WORKERS = os.cpu_count() or 1
+WINDOW_CHUNKS = 4096
+
+@functools.lru_cache(maxsize=None)
+def chunk_hasher(chunk_size):
+    """
+    Returns a generator function that digests every full-sized chunk of a buffer.
+
+    The chunk size is fixed for a whole run, so a hasher is built once per
+    size with the size bound into it. Digests are yielded one at a time, so
+    memory follows the number of unique chunks rather than the file size.
+
+    Args:
+        chunk_size (int): The size of each chunk in bytes.
+    """
+    def hash_chunks(view):
+        for offset in range(0, len(view) - chunk_size + 1, chunk_size):
+            yield chunk_digest(view[offset:offset + chunk_size])
+    return hash_chunks
+
+
+def read_chunk_preview(filepath, offset, size=8):
+    """
+    Reads the first bytes of a chunk back from disk for the report.
+
+    Args:
+        filepath (str): The file the chunk was found in.
+        offset (int): The chunk's offset within the file.
+        size (int): The number of bytes to read. Default is 8 (16 hex chars).
+    """
+    with open(filepath, 'rb') as f:
+        f.seek(offset)
+        return f.read(size)
+
+
+def hash_window(mm, chunk_size, start, stop):
+    """
+    Digests the full-sized chunks of one window of a mapped file.
+
+    Runs on a pool thread. The window's view is taken and released here, so
+    no slice of the mapping outlives the task.
+
+    Args:
+        mm (mmap.mmap): The mapped file.
+        chunk_size (int): The size of each chunk in bytes.
+        start (int): The window's first byte.
+        stop (int): The window's end.
+
+    Returns:
+        list: The digests of the window's chunks, in order.
+    """
+    with memoryview(mm) as view:
+        return list(chunk_hasher(chunk_size)(view[start:stop]))
+
+
+def file_digests(filepath, chunk_size, pool=None):
+    """
+    Yields the digest of every full-sized chunk of a single file, in order.
+
+    Without a pool the chunks are hashed inline. With one, the mapped file is
+    cut into windows of WINDOW_CHUNKS chunks that are hashed on the pool, and
+    only one window per worker is submitted ahead of the one being consumed,
+    so memory stays bounded by the window size rather than the file size.
+
+    Args:
+        filepath (str): The file to digest.
+        chunk_size (int): The size of each chunk in bytes.
+        pool (ThreadPoolExecutor): The pool to hash windows on, or None.
+    """
+    with open(filepath, 'rb') as f:
+        file_size = os.fstat(f.fileno()).st_size
+        # We only count full-sized chunks for accurate stats,
+        # as partial chunks at the end of files can skew the ratio.
+        if file_size < chunk_size:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if pool is None:
+                # Hash zero-copy slices of the mapped file instead of reading a copy of each chunk
+                with memoryview(mm) as view:
+                    yield from chunk_hasher(chunk_size)(view)
+                return
+
+            window = WINDOW_CHUNKS * chunk_size
+            pending = deque()
+            try:
+                for start in range(0, file_size, window):
+                    pending.append(pool.submit(hash_window, mm, chunk_size, start, start + window))
+                    if len(pending) > HASH_WORKERS:
+                        yield from pending.popleft().result()
+                while pending:
+                    yield from pending.popleft().result()
+            finally:
+                # The mapping cannot be closed while a worker still has a view of it
+                for future in pending:
+                    future.cancel()
+                wait(pending)
+
+
 def analyze_files(file_glob, chunk_size, limit):
     """
     Analyzes files to find duplicate chunks.
@@ -20,8 +136,11 @@ def analyze_files(file_glob, chunk_size, limit):
         chunk_size (int): The size of each chunk in bytes.
         limit (int): The number of top duplicate chunks to report. 0 for all.
     """
+    # Chunks are counted by a 64-bit digest rather than by their full contents.
+    # For duplicates only the location is kept; the reported chunks are read
+    # back from disk for their preview once the counting pass is done.
     chunk_counts = defaultdict(int)
-    chunk_bytes = defaultdict(int)
+    duplicate_locations = {}
 
     print(f"[*] Starting analysis with chunk size: {chunk_size} bytes")
     print(f"[*] Searching for files with pattern: {file_glob}\n")
@@ -37,22 +156,21 @@ def analyze_files(file_glob, chunk_size, limit):
     print(f"[*] Found {len(files_to_process)} files to process.")
     total_original_size = sum(os.path.getsize(f) for f in files_to_process)
 
-    for filepath in files_to_process:
-        try:
-            with open(filepath, 'rb') as f:
-                while True:
-                    chunk = f.read(chunk_size)
-                    if not chunk:
-                        break
-                    # We only count full-sized chunks for accurate stats,
-                    # as partial chunks at the end of files can skew the ratio.
-                    if len(chunk) == chunk_size:
-                        chunk_counts[chunk] += 1
-                        chunk_bytes[chunk] = len(chunk)
-        except IOError as e:
-            print(f"[!] Error reading file {filepath}: {e}")
-        except Exception as e:
-            print(f"[!] An unexpected error occurred with file {filepath}: {e}")
+    # Chunks large enough to release the GIL are hashed on a thread pool;
+    # smaller ones would only pay the thread hand-off cost. Either way the
+    # digests are counted here, in file order.
+    with ThreadPoolExecutor(max_workers=HASH_WORKERS) as pool:
+        hash_pool = pool if chunk_size >= GIL_RELEASE_SIZE else None
+        for filepath in files_to_process:
+            try:
+                for index, digest in enumerate(file_digests(filepath, chunk_size, hash_pool)):
+                    count = chunk_counts[digest] = chunk_counts[digest] + 1
+                    if count == 2:
+                        duplicate_locations[digest] = (filepath, index * chunk_size)
+            except IOError as e:
+                print(f"[!] Error reading file {filepath}: {e}")
+            except Exception as e:
+                print(f"[!] An unexpected error occurred with file {filepath}: {e}")
 
     # --- Analysis ---
     if not chunk_counts:
@@ -61,7 +179,7 @@ def analyze_files(file_glob, chunk_size, limit):
         return
 
     # Filter for chunks that appear more than once
-    duplicate_chunks = {chunk: count for chunk, count in chunk_counts.items() if count > 1}
+    duplicate_chunks = {digest: count for digest, count in chunk_counts.items() if count > 1}
 
     if not duplicate_chunks:
         print("\n--- Analysis Complete ---")
@@ -71,16 +189,20 @@ def analyze_files(file_glob, chunk_size, limit):
     # Calculate savings for each duplicate chunk
     # Savings = (count - 1) * chunk_size
     chunk_savings = {
-        chunk: (count - 1) * chunk_bytes[chunk]
-        for chunk, count in duplicate_chunks.items()
+        digest: (count - 1) * chunk_size
+        for digest, count in duplicate_chunks.items()
     }
 
-    # Sort chunks by the potential savings in descending order
-    sorted_chunks = sorted(
-        chunk_savings.items(),
-        key=lambda item: item[1],
-        reverse=True
-    )
+    # Sort chunks by the potential savings in descending order. Only the top
+    # `limit` chunks are reported, so a heap-based partial sort is enough.
+    if limit == 0:
+        sorted_chunks = sorted(
+            chunk_savings.items(),
+            key=lambda item: item[1],
+            reverse=True
+        )
+    else:
+        sorted_chunks = heapq.nlargest(limit, chunk_savings.items(), key=lambda item: item[1])
 
     # --- Reporting ---
     print("\n--- Deduplication Report ---")
@@ -112,10 +234,10 @@ def analyze_files(file_glob, chunk_size, limit):
     print(f"{'Rank':<5} | {'Chunk Hash (first 16 chars)':<30} | {'Count':<10} | {'Savings (Bytes)':<20}")
     print("-" * 70)
 
-    for i, (chunk, savings) in enumerate(sorted_chunks[:report_limit]):
+    for i, (digest, savings) in enumerate(sorted_chunks[:report_limit]):
         # Represent the binary chunk with a portion of its hex representation
-        chunk_repr = chunk.hex()[:16] + '...'
-        count = chunk_counts[chunk]
+        chunk_repr = read_chunk_preview(*duplicate_locations[digest]).hex() + '...'
+        count = chunk_counts[digest]
         rank = i + 1
         print(f"{rank:<5} | {chunk_repr:<30} | {count:<10} | {savings:<20}")
 
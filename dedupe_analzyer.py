@@ -5,6 +5,10 @@ import re
 from collections import Counter
 import os
 
+# A maximal run of word characters is already bounded on both sides, so the
+# pattern needs no \b anchors; it is compiled once for all files.
+WORD_PATTERN = re.compile(r'\w+')
+
 def analyze_files(file_glob, limit):
     """
     Analyzes files matching a glob pattern to find duplicate words and calculate
@@ -19,7 +23,6 @@ def analyze_files(file_glob, limit):
     """
     word_counter = Counter()
     total_words = 0
-    total_bytes_original = 0
     processed_files = []
 
     # Find all files matching the glob pattern
@@ -38,12 +41,9 @@ def analyze_files(file_glob, limit):
             with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
                 content = f.read()
                 # Simple word tokenization: lowercase and split by non-alphanumeric characters
-                words = re.findall(r'\b\w+\b', content.lower())
-                
-                for word in words:
-                    word_counter[word] += 1
-                    total_bytes_original += len(word.encode('utf-8'))
-                
+                words = WORD_PATTERN.findall(content.lower())
+                # Counter.update runs the counting loop in C
+                word_counter.update(words)
                 total_words += len(words)
 
         except Exception as e:
@@ -58,8 +58,12 @@ def analyze_files(file_glob, limit):
     unique_words = list(word_counter.keys())
     num_unique_words = len(unique_words)
     
+    # Byte sizes are computed once per unique word instead of once per occurrence
+    word_sizes = {word: len(word.encode('utf-8')) for word in unique_words}
+    total_bytes_original = sum(word_sizes[word] * count for word, count in word_counter.items())
+
     # Calculate the size if we only stored each unique word once
-    total_bytes_deduplicated = sum(len(word.encode('utf-8')) for word in unique_words)
+    total_bytes_deduplicated = sum(word_sizes.values())
 
     # For a true deduplication system, you'd also need pointers/references.
     # We'll estimate this as a small overhead per word occurrence.
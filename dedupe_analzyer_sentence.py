@@ -1,9 +1,12 @@
 #!/usr/bin/env python3
 import argparse
 import glob
-from collections import defaultdict
+from collections import Counter
 import os
 
+# Buffer size for reading input files; far fewer read() calls than the 8 KiB default
+BUF = 1 << 20
+
 def analyze_files(file_glob, limit):
     """
     Analyzes a collection of text files to find duplicate sentences and calculate
@@ -14,12 +17,10 @@ def analyze_files(file_glob, limit):
         limit (int): The number of top duplicate sentences to display in the report.
                      If 0, all unique sentences are shown.
     """
-    # Use a defaultdict to easily handle counting and byte storage
-    # The structure will be: {sentence: {'count': N, 'bytes': M}}
-    sentence_stats = defaultdict(lambda: {'count': 0, 'bytes': 0})
+    # Counts every distinct sentence; byte sizes are worked out afterwards,
+    # once per unique sentence instead of once per occurrence
+    sentence_counts = Counter()
     
-    total_bytes_processed = 0
-    total_sentences = 0
     files_processed = 0
 
     # Expand the glob pattern to get a list of file paths
@@ -35,41 +36,28 @@ def analyze_files(file_glob, limit):
             
         files_processed += 1
         try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                for line in f:
-                    # Treat each line as a sentence
-                    sentence = line.strip()
-                    if not sentence:
-                        continue # Skip empty lines
-
-                    total_sentences += 1
-                    
-                    # Encode to get the byte size, as strings in Python are abstract
-                    sentence_bytes = len(sentence.encode('utf-8'))
-                    total_bytes_processed += sentence_bytes
-                    
-                    # Update stats for this sentence
-                    sentence_stats[sentence]['count'] += 1
-                    # Store the byte size of a single instance of the sentence
-                    if sentence_stats[sentence]['bytes'] == 0:
-                        sentence_stats[sentence]['bytes'] = sentence_bytes
+            with open(file_path, 'r', encoding='utf-8', errors='ignore', buffering=BUF) as f:
+                # Treat each line as a sentence, skipping empty lines.
+                # Counter.update runs the counting loop in C
+                sentence_counts.update(sentence for sentence in map(str.strip, f) if sentence)
         except Exception as e:
             print(f"Could not read file {file_path}: {e}")
 
     # --- Calculations for the report ---
     
-    # Sort sentences by frequency (most common first)
-    # The key is a lambda function that accesses the 'count' for each sentence
-    sorted_sentences = sorted(
-        sentence_stats.items(), 
-        key=lambda item: item[1]['count'], 
-        reverse=True
-    )
+    # Sort sentences by frequency (most common first). Only the top `limit`
+    # are reported, so most_common() can pick them with a small heap
+    sorted_sentences = sentence_counts.most_common(limit or None)
+
+    unique_sentences_count = len(sentence_counts)
+    total_sentences = sum(sentence_counts.values())
 
-    unique_sentences_count = len(sentence_stats)
+    # Encode to get the byte size, as strings in Python are abstract
+    sentence_sizes = {sentence: len(sentence.encode('utf-8')) for sentence in sentence_counts}
+    total_bytes_processed = sum(sentence_sizes[sentence] * count for sentence, count in sentence_counts.items())
     
     # Calculate the size if all sentences were stored uniquely
-    deduplicated_size = sum(item[1]['bytes'] for item in sentence_stats.items())
+    deduplicated_size = sum(sentence_sizes.values())
     
     # Calculate potential savings
     bytes_saved = total_bytes_processed - deduplicated_size
@@ -114,10 +102,9 @@ def analyze_files(file_glob, limit):
     print("-" * 80)
 
     # Print the top sentences
-    for i, (sentence, stats) in enumerate(sorted_sentences[:display_limit]):
+    for i, (sentence, count) in enumerate(sorted_sentences[:display_limit]):
         rank = i + 1
-        count = stats['count']
-        single_bytes = stats['bytes']
+        single_bytes = sentence_sizes[sentence]
         total_bytes = count * single_bytes
         # Truncate long sentences for display purposes
         display_sentence = (sentence[:70] + '...') if len(sentence) > 73 else sentence
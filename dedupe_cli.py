@@ -8,12 +8,58 @@ import sys
 import xxhash
 from typing import Set, IO, Union, Tuple, Dict
 
+try:
+    import zstandard
+except ImportError:
+    # zstandard is optional; without it the store falls back to gzip
+    zstandard = None
+
+# Every zstandard frame starts with these bytes; gzip files start with b'\x1f\x8b'.
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+# Raised when a zstandard blob is corrupt or truncated; nothing when it is missing
+DECOMPRESS_ERRORS = (zstandard.ZstdError,) if zstandard else ()
+
+# Encoded hashes are collected in memory and written out in blocks of this size.
+WRITE_BLOCK_SIZE = 64 * 1024
+
+def open_blob(path: str, mode: str) -> IO[bytes]:
+    """
+    Opens a hash store blob file for reading ('rb') or writing ('wb').
+
+    Blobs are written with zstandard (level 3, multithreaded) when it is
+    installed and with gzip otherwise. When reading, the compression is
+    detected from the file's magic bytes, so older gzip blobs still load.
+
+    Args:
+        path (str): The path of the blob file.
+        mode (str): Either 'rb' or 'wb'.
+
+    Returns:
+        IO[bytes]: A binary file object that (de)compresses transparently.
+    """
+    if mode == 'rb':
+        with open(path, 'rb') as f:
+            magic = f.read(len(ZSTD_MAGIC))
+        if magic != ZSTD_MAGIC:
+            return gzip.open(path, 'rb')
+        if zstandard is None:
+            # Starting fresh here would overwrite the existing store on save
+            print(f"Error: '{path}' is zstandard-compressed but the 'zstandard' library is not installed.")
+            print("Please install it using: pip install zstandard")
+            sys.exit(1)
+        return zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'))
+
+    if zstandard is None:
+        return gzip.open(path, 'wb')
+    return zstandard.ZstdCompressor(level=3, threads=-1).stream_writer(open(path, 'wb'))
+
 # --- Core Logic Classes (provided by user) ---
 
 class HashStore:
     """
     Manages the storage of unique items by mapping a hash to the original string.
-    Handles serialization to a compressed blob file.
+    Handles serialization to a compressed blob file (zstandard or gzip).
     """
 
     def __init__(self, blob_path: str = 'dedupe_store.pkl.gz'):
@@ -24,17 +70,17 @@ class HashStore:
             blob_path (str): The path to store the compressed data blob.
         """
         # The dictionary will store: { hash: original_string }
-        self.items: Dict[str, str] = {}
+        self.items: Dict[bytes, str] = {}
         self.blob_path = blob_path
         self._load_store()
 
-    def add_item(self, item_hash: str, original_string: str) -> bool:
+    def add_item(self, item_hash: bytes, original_string: str) -> bool:
         """
         Adds an item (hash and original string) to the store if the hash is not already present.
         If a hash collision is detected, a warning is printed.
 
         Args:
-            item_hash (str): The hash of the string.
+            item_hash (bytes): The raw 4-byte hash of the string.
             original_string (str): The original string to store.
 
         Returns:
@@ -44,7 +90,7 @@ class HashStore:
             # Check for a true hash collision (different strings, same hash)
             if self.items[item_hash] != original_string:
                 print(f"WARNING: Hash collision detected! The following string was ignored:")
-                print(f"  Hash: '{item_hash}'")
+                print(f"  Hash: '{item_hash.hex()}'")
                 print(f"  Existing string: '{self.items[item_hash]}'")
                 print(f"  Ignored string:  '{original_string}'")
             return False
@@ -52,12 +98,12 @@ class HashStore:
             self.items[item_hash] = original_string
             return True
 
-    def get_string_by_hash(self, item_hash: str) -> Union[str, None]:
+    def get_string_by_hash(self, item_hash: bytes) -> Union[str, None]:
         """
         Retrieves the original string for a given hash.
 
         Args:
-            item_hash (str): The hash to look up.
+            item_hash (bytes): The raw 4-byte hash to look up.
 
         Returns:
             Union[str, None]: The original string if found, otherwise None.
@@ -68,27 +114,30 @@ class HashStore:
         """Loads the hash-to-string dictionary from the blob file if it exists."""
         if os.path.exists(self.blob_path):
             try:
-                with gzip.open(self.blob_path, 'rb') as f:
+                with open_blob(self.blob_path, 'rb') as f:
                     self.items = pickle.load(f)
+                # Stores written by older versions are keyed by hex strings
+                if self.items and isinstance(next(iter(self.items)), str):
+                    self.items = {bytes.fromhex(k): v for k, v in self.items.items()}
                 print(f"Loaded {len(self.items)} items from {self.blob_path}")
             except (pickle.UnpicklingError, EOFError, gzip.BadGzipFile) as e:
                 print(f"Warning: Could not load data blob from {self.blob_path}. Starting fresh. Error: {e}")
                 self.items = {}
-            except Exception as e:
-                print(f"An unexpected error occurred while loading: {e}")
+            except DECOMPRESS_ERRORS as e:
+                print(f"Warning: Could not decompress {self.blob_path}. Starting fresh. Error: {e}")
                 self.items = {}
 
 
     def save_store(self):
         """Saves the current hash-to-string dictionary to the compressed blob file."""
         try:
-            with gzip.open(self.blob_path, 'wb') as f:
+            with open_blob(self.blob_path, 'wb') as f:
                 pickle.dump(self.items, f, protocol=pickle.HIGHEST_PROTOCOL)
             print(f"Successfully saved {len(self.items)} items to {self.blob_path}")
         except IOError as e:
             print(f"Error: Could not write to blob file at {self.blob_path}. Error: {e}")
 
-    def __contains__(self, item_hash: str) -> bool:
+    def __contains__(self, item_hash: bytes) -> bool:
         """Allows for `in` operator checking against hashes."""
         return item_hash in self.items
 
@@ -112,22 +161,30 @@ class DedupeEngine:
         self.hash_store = hash_store
 
     @staticmethod
-    def _generate_hash(text: str) -> str:
+    def _generate_hash(text: str) -> bytes:
         """
-        Generates a 4-byte hash (8 hex characters) for a given text string using xxhash.
+        Generates a raw 4-byte hash for a given text string using xxhash.
         This hash is now case-sensitive.
 
         Args:
             text (str): The input string to hash.
 
         Returns:
-            str: The hexadecimal representation of the 4-byte hash.
+            bytes: The 4-byte hash, as written to encoded files.
         """
         # The hash is now case-sensitive, so no .lower() conversion is needed.
         normalized_text = text.strip()
         
-        # Generate a 32-bit hash using xxhash and return its hex representation
-        return xxhash.xxh32(normalized_text.encode('utf-8')).hexdigest()
+        data = normalized_text.encode('utf-8')
+        # Generate a 32-bit hash using xxhash and return its raw digest
+        digest = xxhash.xxh32(data).digest()
+        # Encoded files mark blank lines with a single zero byte, so a digest
+        # starting with one is replaced by hashing again with seeds 1, 2, ...
+        seed = 0
+        while not digest[0]:
+            seed += 1
+            digest = xxhash.xxh32(data, seed).digest()
+        return digest
 
     def process_line(self, line: str) -> Tuple[Union[str, None], bool]:
         """
@@ -170,11 +227,12 @@ class DedupeEngine:
             # Open the output file in binary mode
             with open(input_file_path, 'r', encoding='utf-8') as infile, \
                  open(output_file_path, 'wb') as outfile:
+                encoded = bytearray()
                 for line in infile:
                     stripped_line = line.strip()
                     if not stripped_line:
                         # Write a special binary marker for a blank line
-                        outfile.write(b'\x00')
+                        encoded += b'\x00'
                         continue
 
                     line_hash = self._generate_hash(stripped_line)
@@ -184,8 +242,13 @@ class DedupeEngine:
                     if is_new:
                         new_lines_count += 1
                     
-                    # Convert the hex hash to binary and write it to the file
-                    outfile.write(bytes.fromhex(line_hash))
+                    # The hash is already in its binary form
+                    encoded += line_hash
+                    if len(encoded) >= WRITE_BLOCK_SIZE:
+                        outfile.write(encoded)
+                        encoded.clear()
+
+                outfile.write(encoded)
 
             print(f"Processed {input_file_path}. Added {new_lines_count} new unique lines to the store.")
             print(f"Hashes of all non-empty content written to {output_file_path} in compact binary format.")
@@ -344,15 +407,13 @@ def main():
                         print(f"Warning: Unexpected file format. Hash length is not 4 bytes.")
                         break
 
-                    # Convert the binary hash back to a hex string
-                    hash_value = hash_bytes.hex()
-                    
-                    original_string = hash_store.get_string_by_hash(hash_value)
+                    # The store is keyed by the raw hash bytes, so no conversion is needed
+                    original_string = hash_store.get_string_by_hash(hash_bytes)
                     if original_string:
                         # Print the original string
                         print(original_string)
                     else:
-                        print(f"Warning: Hash '{hash_value}' not found in the database.")
+                        print(f"Warning: Hash '{hash_bytes.hex()}' not found in the database.")
         except FileNotFoundError:
             print(f"Error: Hash file not found at {args.decode}")
             sys.exit(1)
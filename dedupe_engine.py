@@ -1,13 +1,76 @@
+import functools
 import hashlib
 import pickle
 import gzip
 import os
-from typing import Set, IO, Union, Tuple, Dict
+import sys
+from typing import Set, IO, Union, Tuple, Dict, List
+
+# Size in bytes of the BLAKE2b digests that key a HashStore
+HASH_SIZE = 16
+
+# Buffer size for the input and output files of process_file
+BUF = 1 << 20
+
+try:
+    import zstandard
+except ImportError:
+    # zstandard is optional; without it stores fall back to gzip
+    zstandard = None
+
+# Every zstandard frame starts with these bytes; gzip files start with b'\x1f\x8b'.
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+# Raised when a zstandard blob is corrupt or truncated; nothing when it is missing
+DECOMPRESS_ERRORS = (zstandard.ZstdError,) if zstandard else ()
+
+def open_blob(path: str, mode: str) -> IO[bytes]:
+    """
+    Opens a hash store blob file for reading ('rb') or writing ('wb').
+
+    Blobs are written with zstandard (level 3, multithreaded) when it is
+    installed and with gzip otherwise. When reading, the compression is
+    detected from the file's magic bytes, so older gzip blobs still load.
+
+    Args:
+        path (str): The path of the blob file.
+        mode (str): Either 'rb' or 'wb'.
+
+    Returns:
+        IO[bytes]: A binary file object that (de)compresses transparently.
+    """
+    if mode == 'rb':
+        with open(path, 'rb') as f:
+            magic = f.read(len(ZSTD_MAGIC))
+        if magic != ZSTD_MAGIC:
+            return gzip.open(path, 'rb')
+        if zstandard is None:
+            # Starting fresh here would overwrite the existing store on save
+            print(f"Error: '{path}' is zstandard-compressed but the 'zstandard' library is not installed.")
+            print("Please install it using: pip install zstandard")
+            sys.exit(1)
+        return zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'))
+
+    if zstandard is None:
+        return gzip.open(path, 'wb')
+    return zstandard.ZstdCompressor(level=3, threads=-1).stream_writer(open(path, 'wb'))
+
+def _split_hashes(keys: bytes) -> List[bytes]:
+    """
+    Splits concatenated hashes, as written by save_store, back into a list.
+
+    Args:
+        keys (bytes): HASH_SIZE-byte hashes joined end to end.
+
+    Returns:
+        List[bytes]: The individual hashes, in order.
+    """
+    return [keys[i:i + HASH_SIZE] for i in range(0, len(keys), HASH_SIZE)]
 
 class HashStore:
     """
     Manages the storage of unique items by mapping a hash to the original string.
-    Handles serialization to a compressed blob file.
+    Handles serialization to a compressed blob file (zstandard or gzip).
     """
 
     def __init__(self, blob_path: str = 'dedupe_store.pkl.gz'):
@@ -18,16 +81,16 @@ class HashStore:
             blob_path (str): The path to store the compressed data blob.
         """
         # The dictionary will store: { hash: original_string }
-        self.items: Dict[str, str] = {}
+        self.items: Dict[bytes, str] = {}
         self.blob_path = blob_path
         self._load_store()
 
-    def add_item(self, item_hash: str, original_string: str) -> bool:
+    def add_item(self, item_hash: bytes, original_string: str) -> bool:
         """
         Adds an item (hash and original string) to the store if the hash is not already present.
 
         Args:
-            item_hash (str): The hash of the string.
+            item_hash (bytes): The raw hash of the string.
             original_string (str): The original string to store.
 
         Returns:
@@ -38,12 +101,12 @@ class HashStore:
             return True
         return False
 
-    def get_string_by_hash(self, item_hash: str) -> Union[str, None]:
+    def get_string_by_hash(self, item_hash: bytes) -> Union[str, None]:
         """
         Retrieves the original string for a given hash.
 
         Args:
-            item_hash (str): The hash to look up.
+            item_hash (bytes): The raw hash to look up.
 
         Returns:
             Union[str, None]: The original string if found, otherwise None.
@@ -54,23 +117,43 @@ class HashStore:
         """Loads the hash-to-string dictionary from the blob file if it exists."""
         if os.path.exists(self.blob_path):
             try:
-                with gzip.open(self.blob_path, 'rb') as f:
-                    self.items = pickle.load(f)
+                with open_blob(self.blob_path, 'rb') as f:
+                    data = pickle.load(f)
+                if isinstance(data, tuple):
+                    # Flat layout: every key concatenated, then the strings in the same order
+                    keys, values = data
+                    self.items = dict(zip(_split_hashes(keys), values))
+                else:
+                    # Older versions pickled the dictionary itself
+                    self.items = data
+                # Stores written by older versions are keyed by SHA-256 hex strings;
+                # the keys are rebuilt from the stored strings
+                if self.items and isinstance(next(iter(self.items)), str):
+                    self.items = {DedupeEngine._generate_hash(v.lower()): v for v in self.items.values()}
                 print(f"Loaded {len(self.items)} items from {self.blob_path}")
             except (pickle.UnpicklingError, EOFError, gzip.BadGzipFile) as e:
                 print(f"Warning: Could not load data blob from {self.blob_path}. Starting fresh. Error: {e}")
                 self.items = {}
+            except DECOMPRESS_ERRORS as e:
+                print(f"Warning: Could not decompress {self.blob_path}. Starting fresh. Error: {e}")
+                self.items = {}
 
     def save_store(self):
-        """Saves the current hash-to-string dictionary to the compressed blob file."""
+        """
+        Saves the current hash-to-string dictionary to the compressed blob file.
+
+        The keys all have the same size, so they are pickled as one bytes
+        object next to a list of the strings instead of as a dictionary;
+        that is one object per entry less to frame and rebuild.
+        """
         try:
-            with gzip.open(self.blob_path, 'wb') as f:
-                pickle.dump(self.items, f, protocol=pickle.HIGHEST_PROTOCOL)
+            with open_blob(self.blob_path, 'wb') as f:
+                pickle.dump((b''.join(self.items), list(self.items.values())), f, protocol=5)
             print(f"Successfully saved {len(self.items)} items to {self.blob_path}")
         except IOError as e:
             print(f"Error: Could not write to blob file at {self.blob_path}. Error: {e}")
 
-    def __contains__(self, item_hash: str) -> bool:
+    def __contains__(self, item_hash: bytes) -> bool:
         """Allows for `in` operator checking against hashes."""
         return item_hash in self.items
 
@@ -78,35 +161,191 @@ class HashStore:
         """Returns the number of unique items stored."""
         return len(self.items)
 
-class DedupeEngine:
+class HashSetStore:
     """
-    A deduplication engine that processes text lines and files,
-    using hashing to identify and store unique entries.
+    Manages the storage of unique items as a set of their hashes.
+
+    Only membership is kept, which is all that is needed to write the unique
+    lines of a file; without the strings the store takes far less memory
+    than a HashStore.
+    Handles serialization to a compressed blob file (zstandard or gzip).
     """
 
-    def __init__(self, hash_store: HashStore):
+    def __init__(self, blob_path: str = 'dedupe_hashset_store.pkl.gz'):
         """
-        Initializes the DedupeEngine with a specific hash store.
+        Initializes the HashSetStore.
 
         Args:
-            hash_store (HashStore): The storage backend for hashes and strings.
+            blob_path (str): The path to store the compressed data blob.
         """
-        self.hash_store = hash_store
+        self.items: Set[bytes] = set()
+        self.blob_path = blob_path
+        self._load_store()
 
-    @staticmethod
-    def _generate_hash(text: str) -> str:
+    def add_item(self, item_hash: bytes, original_string: Union[str, None] = None) -> bool:
         """
-        Generates a SHA-256 hash for a given text string.
+        Adds a hash to the store if it is not already present.
 
         Args:
-            text (str): The input string to hash.
+            item_hash (bytes): The raw hash of the string.
+            original_string (Union[str, None]): Unused; accepted so the store
+                                                can stand in for a HashStore.
 
         Returns:
-            str: The hexadecimal representation of the hash.
+            bool: True if the item was new and added, False otherwise.
         """
-        # Normalize the string to ensure consistent hashing
-        normalized_text = text.strip().lower()
-        return hashlib.sha256(normalized_text.encode('utf-8')).hexdigest()
+        if item_hash not in self.items:
+            self.items.add(item_hash)
+            return True
+        return False
+
+    def _load_store(self):
+        """Loads the set of hashes from the blob file if it exists."""
+        if os.path.exists(self.blob_path):
+            try:
+                with open_blob(self.blob_path, 'rb') as f:
+                    keys = pickle.load(f)
+                self.items = set(_split_hashes(keys))
+                print(f"Loaded {len(self.items)} items from {self.blob_path}")
+            except (pickle.UnpicklingError, EOFError, gzip.BadGzipFile) as e:
+                print(f"Warning: Could not load data blob from {self.blob_path}. Starting fresh. Error: {e}")
+                self.items = set()
+            except DECOMPRESS_ERRORS as e:
+                print(f"Warning: Could not decompress {self.blob_path}. Starting fresh. Error: {e}")
+                self.items = set()
+
+    def save_store(self):
+        """Saves the current set of hashes, concatenated, to the compressed blob file."""
+        try:
+            with open_blob(self.blob_path, 'wb') as f:
+                pickle.dump(b''.join(self.items), f, protocol=5)
+            print(f"Successfully saved {len(self.items)} items to {self.blob_path}")
+        except IOError as e:
+            print(f"Error: Could not write to blob file at {self.blob_path}. Error: {e}")
+
+    def __contains__(self, item_hash: bytes) -> bool:
+        """Allows for `in` operator checking against hashes."""
+        return item_hash in self.items
+
+    def __len__(self) -> int:
+        """Returns the number of unique items stored."""
+        return len(self.items)
+
+class ExactLineStore:
+    """
+    Manages the storage of unique items as a set of their normalized lines.
+
+    Lines are compared exactly instead of by hash, so there is nothing to
+    hash and no chance of a collision. Only membership is kept, which is all
+    that is needed to write the unique lines of a file.
+    Handles serialization to a compressed blob file (zstandard or gzip).
+    """
+
+    # Keyed by the normalized line itself; DedupeEngine skips hashing for it
+    keyed_by_line = True
+
+    def __init__(self, blob_path: str = 'dedupe_exact_store.pkl.gz'):
+        """
+        Initializes the ExactLineStore.
+
+        Args:
+            blob_path (str): The path to store the compressed data blob.
+        """
+        self.items: Set[str] = set()
+        self.blob_path = blob_path
+        self._load_store()
+
+    def add_item(self, normalized_line: str, original_string: Union[str, None] = None) -> bool:
+        """
+        Adds a normalized line to the store if it is not already present.
+
+        Args:
+            normalized_line (str): The stripped and lowercased line.
+            original_string (Union[str, None]): Unused; accepted so the store
+                                                can stand in for a HashStore.
+
+        Returns:
+            bool: True if the item was new and added, False otherwise.
+        """
+        if normalized_line not in self.items:
+            self.items.add(normalized_line)
+            return True
+        return False
+
+    def _load_store(self):
+        """Loads the set of normalized lines from the blob file if it exists."""
+        if os.path.exists(self.blob_path):
+            try:
+                with open_blob(self.blob_path, 'rb') as f:
+                    self.items = pickle.load(f)
+                print(f"Loaded {len(self.items)} items from {self.blob_path}")
+            except (pickle.UnpicklingError, EOFError, gzip.BadGzipFile) as e:
+                print(f"Warning: Could not load data blob from {self.blob_path}. Starting fresh. Error: {e}")
+                self.items = set()
+            except DECOMPRESS_ERRORS as e:
+                print(f"Warning: Could not decompress {self.blob_path}. Starting fresh. Error: {e}")
+                self.items = set()
+
+    def save_store(self):
+        """Saves the current set of normalized lines to the compressed blob file."""
+        try:
+            with open_blob(self.blob_path, 'wb') as f:
+                pickle.dump(self.items, f, protocol=pickle.HIGHEST_PROTOCOL)
+            print(f"Successfully saved {len(self.items)} items to {self.blob_path}")
+        except IOError as e:
+            print(f"Error: Could not write to blob file at {self.blob_path}. Error: {e}")
+
+    def __contains__(self, normalized_line: str) -> bool:
+        """Allows for `in` operator checking against normalized lines."""
+        return normalized_line in self.items
+
+    def __len__(self) -> int:
+        """Returns the number of unique items stored."""
+        return len(self.items)
+
+@functools.lru_cache(maxsize=131072)
+def _generate_hash(normalized_text: str) -> bytes:
+    """
+    Generates a 16-byte BLAKE2b hash for a normalized text string.
+
+    BLAKE2b is considerably faster than SHA-256 in CPython, and 16 bytes
+    is ample to keep collisions out of reach for billions of lines.
+    Results are cached per line, so a line that repeats within the cache
+    window is hashed only once.
+
+    Args:
+        normalized_text (str): The stripped and lowercased string to hash.
+            Callers normalize once and pass the result in, so it is not
+            stripped again here.
+
+    Returns:
+        bytes: The raw digest. Use `.hex()` when it needs to be displayed.
+    """
+    return hashlib.blake2b(normalized_text.encode('utf-8'), digest_size=HASH_SIZE).digest()
+
+class DedupeEngine:
+    """
+    A deduplication engine that processes text lines and files,
+    using hashing to identify and store unique entries.
+    """
+
+    def __init__(self, hash_store: Union[HashStore, HashSetStore, ExactLineStore]):
+        """
+        Initializes the DedupeEngine with a specific hash store.
+
+        Args:
+            hash_store (Union[HashStore, HashSetStore, ExactLineStore]): The
+                storage backend for hashes and strings. A HashSetStore is
+                enough when only the unique lines of files are needed. An
+                ExactLineStore is keyed by the normalized line itself, so
+                no hashing is done at all.
+        """
+        self.hash_store = hash_store
+        # Exact matching follows from the store, so keys always suit it
+        self.exact = getattr(hash_store, 'keyed_by_line', False)
+
+    # The module-level hash function, memoized per line
+    _generate_hash = staticmethod(_generate_hash)
 
     def process_line(self, line: str) -> Tuple[Union[str, None], bool]:
         """
@@ -124,9 +363,15 @@ class DedupeEngine:
         if not stripped_line:
             return None, False # Ignore empty lines
 
-        line_hash = self._generate_hash(stripped_line)
+        # Normalize once; the stored value keeps the original casing
+        normalized_line = stripped_line.lower()
+        if self.exact:
+            # Exact matching compares the normalized line itself
+            line_key = normalized_line
+        else:
+            line_key = self._generate_hash(normalized_line)
         # We pass the stripped line to the store to save space and be consistent.
-        is_new = self.hash_store.add_item(line_hash, stripped_line)
+        is_new = self.hash_store.add_item(line_key, stripped_line)
         
         if is_new:
             # Return the original, un-stripped line to preserve original formatting in output file.
@@ -146,8 +391,8 @@ class DedupeEngine:
         """
         new_lines_count = 0
         try:
-            with open(input_file_path, 'r', encoding='utf-8') as infile, \
-                 open(output_file_path, 'w', encoding='utf-8') as outfile:
+            with open(input_file_path, 'r', encoding='utf-8', buffering=BUF) as infile, \
+                 open(output_file_path, 'w', encoding='utf-8', buffering=BUF) as outfile:
                 for line in infile:
                     unique_line, is_new = self.process_line(line)
                     if is_new and unique_line is not None:
@@ -210,9 +455,9 @@ if __name__ == '__main__':
     print("\n--- Verifying string retrieval by hash ---")
     # Let's get the hash for a known unique phrase
     known_phrase = "A stitch in time saves nine."
-    known_hash = DedupeEngine._generate_hash(known_phrase)
+    known_hash = DedupeEngine._generate_hash(known_phrase.strip().lower())
     
-    print(f"Looking for hash: {known_hash[:10]}...")
+    print(f"Looking for hash: {known_hash.hex()[:10]}...")
     retrieved_string = engine.hash_store.get_string_by_hash(known_hash)
     
     if retrieved_string:
@@ -1,10 +1,15 @@
 import argparse
+from array import array
+from concurrent.futures import ProcessPoolExecutor
 import glob
 import gzip
+import itertools
 import os
 import pickle
+import re
+import struct
 import sys
-from typing import Dict
+from typing import IO, Dict, List, Tuple, Union
 
 try:
     import xxhash
@@ -13,46 +18,228 @@ except ImportError:
     print("Please install it using: pip install xxhash")
     sys.exit(1)
 
+try:
+    import zstandard
+except ImportError:
+    # zstandard is optional; without it the store falls back to gzip
+    zstandard = None
+
+# Every zstandard frame starts with these bytes; gzip files start with b'\x1f\x8b'.
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+# Raised when a zstandard blob is corrupt or truncated; nothing when it is missing
+DECOMPRESS_ERRORS = (zstandard.ZstdError,) if zstandard else ()
+
+# I/O buffer size for seed, input, encoded and hash files (default is 8 KiB)
+BUF = 1 << 20
+
+# Blank lines are encoded as this single byte; every other line as its 4-byte hash
+BLANK_MARKER = b'\x00'
+
+# The smallest key whose big-endian first byte is non-zero; line_key() never
+# returns less, so no hash can be mistaken for BLANK_MARKER
+MIN_KEY = 1 << 24
+
+# One record of an encoded file: a blank line marker, or a hash whose first byte
+# is non-zero. The last alternative only matches a hash cut short by the end of
+# the data, so findall() splits a whole block in a single pass.
+HASH_RECORD = re.compile(rb'\x00|[^\x00][\s\S]{3}|[\s\S]{1,3}')
+
+# On-disk layout of the hash store: a header (magic, item count) followed by
+# chunks of items, each a chunk header (item count, text size), the keys as
+# little-endian uint32s and the strings as newline-separated UTF-8.
+STORE_MAGIC = b'XDS1'
+STORE_HEADER = struct.Struct('<4sI')
+STORE_CHUNK = struct.Struct('<II')
+STORE_CHUNK_ITEMS = 1 << 16
+
+# Soft cap on the number of lines whose digest is remembered during a run
+LINE_CACHE_SIZE = 1 << 17
+
+
+def open_blob(path: str, mode: str) -> IO[bytes]:
+    """
+    Opens a hash store blob file for reading ('rb') or writing ('wb').
+
+    Blobs are written with zstandard (level 3, multithreaded) when it is
+    installed and with gzip otherwise. When reading, the compression is
+    detected from the file's magic bytes, so older gzip blobs still load.
+
+    Args:
+        path (str): The path of the blob file.
+        mode (str): Either 'rb' or 'wb'.
+
+    Returns:
+        IO[bytes]: A binary file object that (de)compresses transparently.
+    """
+    if mode == 'rb':
+        with open(path, 'rb') as f:
+            magic = f.read(len(ZSTD_MAGIC))
+        if magic != ZSTD_MAGIC:
+            return gzip.open(path, 'rb')
+        if zstandard is None:
+            # Starting fresh here would overwrite the existing store on save
+            print(f"Error: '{path}' is zstandard-compressed but the 'zstandard' library is not installed.")
+            print("Please install it using: pip install zstandard")
+            sys.exit(1)
+        return zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'))
+
+    if zstandard is None:
+        return gzip.open(path, 'wb')
+    return zstandard.ZstdCompressor(level=3, threads=-1).stream_writer(open(path, 'wb'))
+
+
+def line_key(data: bytes) -> int:
+    """
+    Returns the store key of a line: its xxhash32 as an integer.
+
+    Encoded files mark blank lines with a single zero byte, so no key may
+    start with one. For the roughly 1 line in 256 whose xxhash32 does, the
+    line is hashed again with seeds 1, 2, ... until the first byte is non-zero.
+
+    Args:
+        data (bytes): The UTF-8 encoded line.
+
+    Returns:
+        int: The key, at least MIN_KEY.
+    """
+    key = xxhash.xxh32_intdigest(data)
+    seed = 0
+    while key < MIN_KEY:
+        seed += 1
+        key = xxhash.xxh32_intdigest(data, seed)
+    return key
+
+
+def scan_hash_block(data: bytes) -> Tuple[List[bytes], int]:
+    """
+    Splits a block of an encoded file into its records.
+
+    Args:
+        data (bytes): Consecutive bytes from a file written by process_and_encode,
+                      starting at a record boundary.
+
+    Returns:
+        Tuple[List[bytes], int]: The complete records in file order, and the
+                                 number of bytes they take up. Any bytes after
+                                 that are the start of an incomplete hash.
+    """
+    records = HASH_RECORD.findall(data)
+    consumed = len(data)
+    if records and len(records[-1]) < 4 and records[-1] != BLANK_MARKER:
+        consumed -= len(records.pop())
+    return records, consumed
+
+
+def _read_exact(f: IO[bytes], size: int) -> bytes:
+    """Reads exactly `size` bytes; decompressing readers may return fewer per call."""
+    data = f.read(size)
+    while len(data) < size:
+        more = f.read(size - len(data))
+        if not more:
+            raise EOFError(f"Store file ends {size - len(data)} bytes early.")
+        data += more
+    return data
+
 
 class HashStore:
     """
     Manages the persistent storage of unique strings and their xxhash32 hashes.
 
-    This class handles loading from and saving to a compressed binary file.
-    It uses a dictionary to map hash hex strings to the original text.
+    This class handles loading from and saving to a compressed binary file
+    (zstandard, or gzip when zstandard is not installed).
+    It uses a dictionary to map 32-bit integer hashes to the original text.
     It includes a crucial check for hash collisions.
     """
 
     def __init__(self, db_path: str):
         """Initializes the HashStore and loads the database from a file."""
         self.db_path = db_path
-        self.store: Dict[str, str] = {}
+        self.store: Dict[int, str] = {}
         self._load()
 
     def _load(self):
-        """Loads the hash store from a gzipped pickle file if it exists."""
+        """Loads the hash store from its compressed file if it exists."""
         if os.path.exists(self.db_path):
             try:
-                with gzip.open(self.db_path, 'rb') as f:
-                    self.store = pickle.load(f)
+                with open_blob(self.db_path, 'rb') as f:
+                    header = f.read(STORE_HEADER.size)
+                    chunked = header.startswith(STORE_MAGIC)
+                    if chunked:
+                        self.store = self._read_chunks(f, STORE_HEADER.unpack(header)[1])
+                if not chunked:
+                    # Stores written by older versions are pickled
+                    self._load_pickle()
                 print(f"Successfully loaded hash store from '{self.db_path}'.")
-            except (IOError, pickle.UnpicklingError) as e:
+            except (IOError, EOFError, struct.error, ValueError, pickle.UnpicklingError) as e:
                 print(f"Warning: Could not load data from '{self.db_path}'. Creating a new empty store. Error: {e}")
                 self.store = {}
+            except DECOMPRESS_ERRORS as e:
+                print(f"Warning: Could not decompress '{self.db_path}'. Creating a new empty store. Error: {e}")
+                self.store = {}
         else:
             print(f"No existing hash store found at '{self.db_path}'. A new store will be created on save.")
 
+    @staticmethod
+    def _read_chunks(f: IO[bytes], count: int) -> Dict[int, str]:
+        """
+        Reads the chunks of a store file, one at a time, into a new dictionary.
+
+        Only one chunk is held besides the dictionary being built, so loading
+        needs little more memory than the loaded store itself.
+        """
+        store: Dict[int, str] = {}
+        while len(store) < count:
+            item_count, text_size = STORE_CHUNK.unpack(_read_exact(f, STORE_CHUNK.size))
+            keys = array('I')
+            keys.frombytes(_read_exact(f, item_count * keys.itemsize))
+            if sys.byteorder == 'big':
+                keys.byteswap()
+            values = _read_exact(f, text_size).decode('utf-8').split('\n')
+            if len(values) != item_count:
+                raise ValueError("Corrupt store chunk: key and string counts differ.")
+            store.update(zip(keys, values))
+        return store
+
+    def _load_pickle(self):
+        """Loads a store pickled by an older version."""
+        with open_blob(self.db_path, 'rb') as f:
+            self.store = pickle.load(f)
+        # Stores written by older versions are keyed by hex strings
+        if self.store and isinstance(next(iter(self.store)), str):
+            self.store = {int(k, 16): v for k, v in self.store.items()}
+
     def save(self):
-        """Saves the current hash store to a gzipped pickle file."""
+        """
+        Saves the current hash store to its compressed file.
+
+        After a header with the item count, the store is written in chunks of
+        up to STORE_CHUNK_ITEMS items: the 32-bit keys as one little-endian
+        array, then the strings joined by newlines. Stored strings are single
+        lines: the engine reads them line by line and add_item rejects any
+        string with a newline in it.
+        """
         try:
-            with gzip.open(self.db_path, 'wb') as f:
-                pickle.dump(self.store, f, protocol=pickle.HIGHEST_PROTOCOL)
+            with open_blob(self.db_path, 'wb') as f:
+                f.write(STORE_HEADER.pack(STORE_MAGIC, len(self.store)))
+                keys_iter = iter(self.store)
+                values_iter = iter(self.store.values())
+                while True:
+                    keys = array('I', itertools.islice(keys_iter, STORE_CHUNK_ITEMS))
+                    if not keys:
+                        break
+                    text = '\n'.join(itertools.islice(values_iter, len(keys))).encode('utf-8')
+                    if sys.byteorder == 'big':
+                        keys.byteswap()
+                    f.write(STORE_CHUNK.pack(len(keys), len(text)))
+                    f.write(keys.tobytes())
+                    f.write(text)
             print(f"Successfully saved hash store to '{self.db_path}'.")
         except IOError as e:
             print(f"Error: Could not save hash store to '{self.db_path}'. Error: {e}")
             sys.exit(1)
 
-    def add_item(self, xxhash_obj: xxhash.xxh32, text: str) -> bool:
+    def add_item(self, key: int, text: str) -> bool:
         """
         Adds a new unique string to the store.
 
@@ -60,24 +247,41 @@ class HashStore:
         corresponding string is different, a warning is printed and the
         new string is not added.
 
+        The engine's loops inline the same setdefault check; this method is
+        for adding single items from other code.
+
         Args:
-            xxhash_obj: An xxhash.xxh32 object containing the hash.
-            text: The original, case-sensitive string.
+            key: The string's key, as returned by line_key() for its UTF-8
+                 encoding.
+            text: The original, case-sensitive string. It must be a single
+                  line; the store file separates strings with newlines.
 
         Returns:
             True if the item was added, False otherwise.
+
+        Raises:
+            ValueError: If the string contains a newline.
         """
-        hash_hex = xxhash_obj.hexdigest()
-        if hash_hex in self.store:
-            # Check for a real collision (different strings, same hash)
-            if self.store[hash_hex] != text:
-                print(f"Warning: Hash collision detected for hex '{hash_hex}'. "
-                      f"Original: '{self.store[hash_hex]}', New: '{text}'. "
-                      "New item ignored.")
-            return False
-        else:
-            self.store[hash_hex] = text
+        if '\n' in text:
+            raise ValueError("Stored strings must be single lines; got a string containing a newline.")
+        # A caller may pass the very string object that is already stored, so
+        # the identity of setdefault's result cannot tell a new item apart here
+        stored = self.store.get(key)
+        if stored is None:
+            self.store[key] = text
             return True
+        # Check for a real collision (different strings, same hash). str's
+        # equality test already returns early on identity or differing length,
+        # so only equal-length strings are compared byte by byte.
+        if stored != text:
+            self._report_collision(key, stored, text)
+        return False
+
+    def _report_collision(self, key: int, stored: str, text: str):
+        """Warns that a string was ignored because its hash belongs to another one."""
+        print(f"Warning: Hash collision detected for hex '{key:08x}'. "
+              f"Original: '{stored}', New: '{text}'. "
+              "New item ignored.")
 
 
 class DedupeEngine:
@@ -91,10 +295,24 @@ class DedupeEngine:
         """Initializes the DedupeEngine with a HashStore instance."""
         self.hash_store = hash_store
 
+    def _remember(self, line_cache: Dict[str, bytes], line: str, digest: bytes):
+        """
+        Caches the digest of a line that is known to be in the store.
+
+        A cached line needs no further hashing or store lookup when it comes
+        up again. Lines that collided with a different stored string must not
+        be cached, so their warning is still printed every time they appear.
+        The cache is simply emptied when it reaches its soft cap.
+        """
+        if len(line_cache) >= LINE_CACHE_SIZE:
+            line_cache.clear()
+        line_cache[line] = digest
+
     def seed_from_glob(self, glob_pattern: str):
         """
         Reads files matching a glob pattern and adds unique lines to the store.
-        This is a memory-efficient, line-by-line process.
+        Each file is read line by line in a worker process. Collisions are
+        reported once per file rather than once per line.
         """
         files = glob.glob(glob_pattern)
         if not files:
@@ -103,21 +321,27 @@ class DedupeEngine:
 
         unique_lines_added = 0
         total_lines_processed = 0
-        for filepath in files:
-            try:
-                with open(filepath, 'r', encoding='utf-8', errors='ignore') as infile:
-                    print(f"Processing file: {filepath}")
-                    for line in infile:
-                        total_lines_processed += 1
-                        line = line.rstrip('\n')
-                        if line:
-                            # Use xxhash32 for a 4-byte hash
-                            h = xxhash.xxh32(line, seed=0)
-                            if self.hash_store.add_item(h, line):
-                                unique_lines_added += 1
-            except IOError as e:
-                print(f"Error processing file '{filepath}': {e}")
-                continue
+        setdefault = self.hash_store.store.setdefault
+        # Files are hashed in parallel by worker processes; their results are
+        # merged here in file order, so the first occurrence of a line still wins
+        max_workers = os.cpu_count() or 1
+        chunksize = max(1, len(files) // (max_workers * 4))
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            results = pool.map(_seed_file, files, chunksize=chunksize)
+            for filepath, (items, collisions, line_count, error) in zip(files, results):
+                total_lines_processed += line_count
+                if error:
+                    print(error)
+                    continue
+                print(f"Processing file: {filepath}")
+                # Lines that collided within their own file can only be
+                # reported here, since their hash is already stored
+                for key, line in itertools.chain(items.items(), collisions):
+                    stored = setdefault(key, line)
+                    if stored is line:
+                        unique_lines_added += 1
+                    elif stored != line:
+                        self.hash_store._report_collision(key, stored, line)
 
         print(f"\nSeeding complete.")
         print(f"Total lines processed: {total_lines_processed}")
@@ -132,21 +356,44 @@ class DedupeEngine:
             print(f"Error: Input file not found at '{input_file}'.")
             sys.exit(1)
 
+        line_cache: Dict[str, bytes] = {}
+        setdefault = self.hash_store.store.setdefault
+        xxh32_digest = xxhash.xxh32_digest
         try:
-            with open(input_file, 'r', encoding='utf-8', errors='ignore') as infile:
-                with open(output_file, 'wb') as outfile:
+            with open(input_file, 'r', encoding='utf-8', errors='ignore', buffering=BUF) as infile:
+                with open(output_file, 'wb', buffering=BUF) as outfile:
                     print(f"Encoding '{input_file}' to '{output_file}'...")
+                    # Encoded records are collected here and written out a
+                    # block at a time instead of one write() call per line
+                    encoded = bytearray()
                     for line in infile:
                         line = line.rstrip('\n')
                         if not line:
                             # Write the special single-byte marker for blank lines
-                            outfile.write(b'\x00')
+                            encoded.append(0)
+                        elif line in line_cache:
+                            # Seen before in this run; reuse its digest
+                            encoded += line_cache[line]
                         else:
                             # Hash the line and add it to the store if it's new
-                            h = xxhash.xxh32(line, seed=0)
-                            self.hash_store.add_item(h, line)
+                            data = line.encode('utf-8')
+                            digest = xxh32_digest(data)
+                            if not digest[0]:
+                                # Would read back as a blank line marker
+                                digest = line_key(data).to_bytes(4, 'big')
+                            # The digest is big-endian, matching xxhash's intdigest()
+                            key = int.from_bytes(digest, 'big')
+                            stored = setdefault(key, line)
+                            if stored is line or stored == line:
+                                self._remember(line_cache, line, digest)
+                            else:
+                                self.hash_store._report_collision(key, stored, line)
                             # Write the raw 4-byte hash to the output file
-                            outfile.write(h.digest())
+                            encoded += digest
+                        if len(encoded) >= BUF:
+                            outfile.write(encoded)
+                            encoded.clear()
+                    outfile.write(encoded)
             print("Encoding complete.")
         except IOError as e:
             print(f"Error during file processing: {e}")
@@ -161,41 +408,83 @@ class DedupeEngine:
             print(f"Error: Hash file not found at '{hash_file}'.")
             sys.exit(1)
 
+        get_string = self.hash_store.store.get
+        # Output text for each distinct record seen so far. Hash files repeat
+        # the same few records many times, so each is looked up only once.
+        lines = {BLANK_MARKER: ''}
         try:
             with open(hash_file, 'rb') as infile:
                 print(f"Decoding '{hash_file}'...")
+                # Records are decoded a block at a time and each block's lines
+                # are written in one go; a hash split across two blocks is
+                # carried over to the next one
+                pending = b''
                 while True:
-                    # Read one byte to check for the blank line marker
-                    chunk = infile.read(1)
-                    if not chunk:
-                        # EOF
+                    block = infile.read(BUF)
+                    if not block:
                         break
-                    
-                    if chunk == b'\x00':
-                        # Special marker found, print a newline
-                        print()
-                    else:
-                        # It's not a marker, so it's the first byte of a hash
-                        remaining_hash_bytes = infile.read(3)
-                        if len(remaining_hash_bytes) != 3:
-                            print("\nWarning: Incomplete hash block found at the end of the file. Stopping decode.")
-                            break
-                        
-                        full_hash_bytes = chunk + remaining_hash_bytes
-                        hash_hex_key = full_hash_bytes.hex()
-                        
-                        if hash_hex_key in self.hash_store.store:
-                            print(self.hash_store.store[hash_hex_key])
-                        else:
-                            print(f"\nWarning: Hash '{hash_hex_key}' not found in the database. "
-                                  "The original line cannot be restored. "
-                                  "The file may have been created with a different database.")
+                    data = pending + block if pending else block
+                    records, consumed = scan_hash_block(data)
+                    pending = data[consumed:]
+                    for record in set(records).difference(lines):
+                        # The digest is big-endian, matching xxhash's intdigest()
+                        key = int.from_bytes(record, 'big')
+                        text = get_string(key)
+                        if text is None:
+                            text = (f"\nWarning: Hash '{key:08x}' not found in the database. "
+                                    "The original line cannot be restored. "
+                                    "The file may have been created with a different database.")
+                        lines[record] = text
+                    if records:
+                        sys.stdout.write('\n'.join(map(lines.__getitem__, records)) + '\n')
+                if pending:
+                    print("\nWarning: Incomplete hash block found at the end of the file. Stopping decode.")
             print("\nDecoding complete.")
         except IOError as e:
             print(f"Error during file decoding: {e}")
             sys.exit(1)
 
 
+def _seed_file(filepath: str) -> Tuple[Dict[int, str], List[Tuple[int, str]], int, Union[str, None]]:
+    """
+    Hashes the lines of one seed file in a worker process.
+
+    Args:
+        filepath: Path to the seed file.
+
+    Returns:
+        The first line seen for each hash, the (hash, line) pairs that
+        collided with it within the file, the number of lines read, and an
+        error message if the file could not be read.
+    """
+    items: Dict[int, str] = {}
+    collisions: Dict[Tuple[int, str], None] = {}
+    seen = set()
+    line_count = 0
+    setdefault = items.setdefault
+    xxh32_intdigest = xxhash.xxh32_intdigest
+    try:
+        with open(filepath, 'r', encoding='utf-8', errors='ignore', buffering=BUF) as infile:
+            for line in infile:
+                line_count += 1
+                line = line.rstrip('\n')
+                if line and line not in seen:
+                    seen.add(line)
+                    # Use xxhash32 for a 4-byte hash; the one-shot function
+                    # skips building a hasher object for every line
+                    data = line.encode('utf-8')
+                    key = xxh32_intdigest(data)
+                    if key < MIN_KEY:
+                        # Would read back as a blank line marker
+                        key = line_key(data)
+                    stored = setdefault(key, line)
+                    if stored is not line:
+                        collisions[key, line] = None
+    except IOError as e:
+        return {}, [], line_count, f"Error processing file '{filepath}': {e}"
+    return items, list(collisions), line_count, None
+
+
 def main():
     """Main function to parse arguments and run the tool."""
     parser = argparse.ArgumentParser(